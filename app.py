@@ -1,4 +1,7 @@
 import os
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, render_template, request, jsonify, send_from_directory
 from processor import FaceProcessor
 
@@ -12,6 +15,37 @@ os.makedirs('static/faces', exist_ok=True)
 
 processor = FaceProcessor()
 
+# Processing runs on a single background worker so uploads return immediately.
+# It stays in-process because the processor keeps its results in memory,
+# which a separate Celery/RQ worker would not share with this app.
+executor = ThreadPoolExecutor(max_workers=1)
+tasks = {} # Map task_id -> Future, dropped once reported as finished
+MAX_TASKS = 100 # Bound for tasks that are never polled
+tasks_lock = threading.Lock()
+latest_run = None # Future of the most recently submitted processing run
+
+def submit_processing(reuse_running):
+    """
+    Queues processor.process_images and returns a task id for polling.
+    A run that has not started yet is reused, since it lists the upload folder
+    when it starts; with reuse_running, a run in progress is reused too.
+    """
+    global latest_run
+    with tasks_lock:
+        future = latest_run
+        if future is None or future.done() or (future.running() and not reuse_running):
+            future = executor.submit(processor.process_images)
+            latest_run = future
+
+        # Every caller gets its own id, so reporting one of them never drops the others
+        task_id = uuid.uuid4().hex
+        tasks[task_id] = future
+        if len(tasks) > MAX_TASKS:
+            finished = [tid for tid, f in tasks.items() if f.done()]
+            for tid in finished[:len(tasks) - MAX_TASKS]:
+                del tasks[tid]
+        return task_id
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -29,18 +63,27 @@ def upload_file():
             continue
         if file:
             filename = file.filename
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
+            processor.save_upload(file, filename)
             saved_files.append(filename)
     
-    # Trigger processing
-    # In a real app, this should be async (Celery/RQ)
-    # For this demo, we run it synchronously
+    # Trigger processing in the background, the client polls /api/task/<task_id>
+    task_id = submit_processing(reuse_running=False)
+    return jsonify({'message': 'Files uploaded, processing started', 'task_id': task_id}), 202
+
+@app.route('/api/task/<task_id>')
+def get_task(task_id):
+    future = tasks.get(task_id)
+    if future is None:
+        return jsonify({'error': 'Unknown task'}), 404
+    if not future.done():
+        return jsonify({'status': 'processing'})
+    with tasks_lock:
+        tasks.pop(task_id, None)
     try:
-        people_summary = processor.process_images()
-        return jsonify({'message': 'Files uploaded and processed', 'people': people_summary})
+        people_summary = future.result()
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'status': 'error', 'error': str(e)}), 500
+    return jsonify({'status': 'done', 'people': people_summary})
 
 @app.route('/api/gallery')
 def get_gallery():
@@ -49,13 +92,12 @@ def get_gallery():
 
 @app.route('/api/people')
 def get_people():
-    # If the server restarted, we might need to re-process or load state.
-    # For this demo, we assume process_images was called at least once or state is in processor.
-    # Note: processor.process_images() re-runs everything. 
-    # processor.get_people_summary() returns current state.
-    # If empty, maybe run process?
-    if not processor.data_records and os.listdir(app.config['UPLOAD_FOLDER']):
-         processor.process_images()
+    # If the server restarted, state has to be rebuilt from the uploads (mostly from the cache).
+    # While that or any other run is pending, the client gets a task id to poll before reloading.
+    run = latest_run
+    if (run is None and processor.get_image_files()) or (run is not None and not run.done()):
+        task_id = submit_processing(reuse_running=True)
+        return jsonify({'status': 'processing', 'task_id': task_id}), 202
          
     return jsonify(processor.get_people_summary())
 
@@ -84,6 +126,7 @@ def rename_person(id):
     return jsonify({'error': 'Name is required'}), 400
 
 if __name__ == '__main__':
+    # Development server only; production runs gunicorn (gunicorn.conf.py) behind nginx (nginx.conf)
     # Obtiene el puerto del entorno, o usa 5000 si no existe
     port = int(os.environ.get("PORT", 5000))
     # host='0.0.0.0' hace que sea visible externamente
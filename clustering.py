@@ -0,0 +1,100 @@
+import numpy as np
+import hnswlib
+from numba import njit
+
+# Above this many faces the dense n x n similarity matrix is replaced by an HNSW index
+HNSW_MIN_FACES = 2000
+# Neighbours fetched per face from the HNSW index; only those within eps are kept
+HNSW_NEIGHBOURS = 32
+
+
+def cluster_embeddings(emb, eps, min_samples):
+    """
+    DBSCAN with cosine distance over L2-normalized embeddings.
+    Returns one label per row, -1 for noise.
+    """
+    if len(emb) < HNSW_MIN_FACES:
+        indptr, indices = _dense_neighbours(emb, eps)
+    else:
+        indptr, indices = _hnsw_neighbours(emb, eps)
+
+    # Each face counts itself, same as sklearn's DBSCAN
+    is_core = np.diff(indptr) >= min_samples
+    return _dbscan_label(indptr, indices, is_core)
+
+
+def _dense_neighbours(emb, eps):
+    """
+    Exact eps-neighbourhoods as CSR (indptr, indices), from a single GEMM.
+    """
+    within = emb @ emb.T >= 1.0 - eps
+    # Guard against rounding on the diagonal, every face is its own neighbour
+    np.fill_diagonal(within, True)
+    indptr = np.concatenate(([0], np.cumsum(within.sum(axis=1))))
+    # nonzero walks row-major, so columns come out grouped by row
+    return indptr, np.nonzero(within)[1]
+
+
+def _hnsw_neighbours(emb, eps):
+    """
+    Approximate eps-neighbourhoods as CSR (indptr, indices), from each row's
+    nearest neighbours in an HNSW index (cosine distance).
+    """
+    n, dim = emb.shape
+    k = min(n, HNSW_NEIGHBOURS)
+
+    index = hnswlib.Index(space='cosine', dim=dim)
+    index.init_index(max_elements=n, ef_construction=200, M=16)
+    index.add_items(emb, np.arange(n))
+    # ef must be at least k for the query to return k neighbours
+    index.set_ef(max(k, 64))
+    neighbours, distances = index.knn_query(emb, k=k)
+
+    within = distances <= eps
+    rows = np.repeat(np.arange(n), within.sum(axis=1))
+    cols = neighbours[within].astype(np.int64)
+
+    # A k-NN list is one-sided; add each edge in both directions so dense
+    # clusters larger than k are not split apart, plus every face to itself
+    self_loops = np.arange(n)
+    pairs = np.unique(np.concatenate((rows * n + cols, cols * n + rows, self_loops * n + self_loops)))
+    rows, cols = np.divmod(pairs, n)
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n))))
+    return indptr, cols
+
+
+@njit(cache=True)
+def _dbscan_label(indptr, indices, is_core):
+    """
+    Expands clusters from core points over the CSR neighbour lists.
+    Follows sklearn's dbscan_inner: border points join the first cluster reaching them.
+    """
+    n = len(is_core)
+    labels = np.full(n, -1, dtype=np.int64)
+    # Every neighbour list is expanded at most once, so the stack never outgrows the edge count
+    stack = np.empty(len(indices) + 1, dtype=np.int64)
+    label_num = 0
+
+    for seed in range(n):
+        if labels[seed] != -1 or not is_core[seed]:
+            continue
+
+        top = 0
+        i = seed
+        while True:
+            if labels[i] == -1:
+                labels[i] = label_num
+                if is_core[i]:
+                    for j in range(indptr[i], indptr[i + 1]):
+                        v = indices[j]
+                        if labels[v] == -1:
+                            stack[top] = v
+                            top += 1
+            if top == 0:
+                break
+            top -= 1
+            i = stack[top]
+
+        label_num += 1
+
+    return labels
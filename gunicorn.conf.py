@@ -0,0 +1,13 @@
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+
+# A single worker process: FaceProcessor keeps the models and the clustering
+# results in memory, and uploads are processed by a background thread inside it.
+# Extra workers would each load the models and see different results.
+workers = 1
+worker_class = 'gthread'
+threads = 2 * (os.cpu_count() or 1) + 1
+
+# Loading (and on GPU compiling) the models happens when the worker boots
+timeout = 180
@@ -1,162 +1,438 @@
 import os
-import shutil
+import hashlib
+import pickle
+import threading
+from collections import defaultdict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import torch
 from facenet_pytorch import MTCNN, InceptionResnetV1
-from sklearn.cluster import DBSCAN
 from sklearn.metrics import silhouette_score, davies_bouldin_score, calinski_harabasz_score
 from sklearn.decomposition import PCA
 from PIL import Image
+from clustering import cluster_embeddings
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+# Max number of images per batch; all faces found in a batch go through the ResNet in one forward pass
+# MTCNN only batches equal-sized images, so detection runs once per group of equal dimensions
+BATCH_SIZE = 16
+# Max total pixels per batch, and of the images decoded ahead of it, so large photos stay within memory
+BATCH_PIXELS = 32 * 1024 * 1024
+# Faces sampled for the silhouette score, which is quadratic in the number of faces
+SILHOUETTE_SAMPLE_SIZE = 256
+# Bump whenever detection/embedding settings change so cached results get recomputed
+CACHE_VERSION = 4
+
+# Results of one processing run, one row/entry per face. Published as a whole so request
+# threads never mix data from two runs; the arrays are read-only.
+FaceData = namedtuple('FaceData', ['version', 'embeddings', 'labels', 'probs', 'image_paths', 'face_paths'])
 
 class FaceProcessor:
-    def __init__(self, upload_folder='static/uploads', faces_folder='static/faces'):
+    def __init__(self, upload_folder='static/uploads', faces_folder='static/faces', cache_path='face_cache.pkl'):
         self.device = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
         print(f"Running on device: {self.device}")
         
         # Initialize MTCNN for face detection
         # Increased min_face_size to avoid very small background faces
+        # The last-stage threshold of 0.90 drops blurry/uncertain faces inside detection,
+        # so they are never cropped, saved or embedded
         self.mtcnn = MTCNN(
             image_size=160, margin=20, min_face_size=40,
-            thresholds=[0.6, 0.7, 0.7], factor=0.709, post_process=True,
+            thresholds=[0.6, 0.7, 0.90], factor=0.709, post_process=True,
             device=self.device, keep_all=True
         )
         
         # Initialize Inception Resnet V1 for face recognition (embeddings)
         self.resnet = InceptionResnetV1(pretrained='vggface2').eval().to(self.device)
+        # Mixed precision only pays off on GPU tensor cores
+        self.use_amp = self.device.type == 'cuda'
+
+        if self.device.type == 'cuda':
+            # Fuse kernels and cut per-op Python overhead. The batch dimension is dynamic since
+            # every batch holds a different number of faces; no CUDA graphs (reduce-overhead),
+            # which would be recorded per batch size and per thread.
+            self.resnet = torch.compile(self.resnet, dynamic=True)
+            # Compile under the same context used in process_images. Batch size 1 is always
+            # specialised by the compiler, so both it and the dynamic graph are built here.
+            with torch.inference_mode(), torch.autocast(device_type='cuda', dtype=torch.float16):
+                for n_faces in (1, 2):
+                    self.resnet(torch.zeros(n_faces, 3, 160, 160, device=self.device))
         
         self.upload_folder = upload_folder
         self.faces_folder = faces_folder
+        # Cached listing of upload_folder, see get_image_files
+        self._image_files = ()
+        self._image_files_mtime = None
+        # Guards the listing and its mtime stamp, uploads and scans may run concurrently
+        self._listing_lock = threading.Lock()
+        # Kept outside static/ so embeddings are never served
+        self.cache_path = cache_path
         
-        # In-memory storage for this demo
-        self.data_records = [] 
-        # Structure: {'image_path': str, 'face_crop_path': str, 'embedding': np.array, 'cluster_id': int}
+        # Detection results per file content hash: {sha256: {'face_files', 'probs', 'embeddings'}}
+        self._cache = self._load_cache()
+        
+        # In-memory storage for this demo, see FaceData
+        # Its version changes on every publish, invalidating the derived caches below
+        self.data = None
+        self._reset_state()
+        self._metrics_cache = (None, None) # (version, metrics)
+        self._scatter_cache = (None, None) # (version, 2D coords)
+        self._people_cache = (None, None) # (version, {cluster_id: (face_url, images)})
         
         self.names = {} # Map cluster_id -> name
 
+        # process_images runs on a background worker and may be triggered from requests too
+        self._lock = threading.Lock()
+
     def process_images(self):
         """
         Scans upload folder, detects faces, generates embeddings, clusters them.
+        Only files whose content is not in the cache go through the models.
         """
-        # Clear previous run data (optional, for this demo logic)
-        self.data_records = []
-        if os.path.exists(self.faces_folder):
-            shutil.rmtree(self.faces_folder)
+        with self._lock:
+            return self._process_images()
+
+    def _process_images(self):
+        # Previous results stay visible to the API until the new ones are ready
         os.makedirs(self.faces_folder, exist_ok=True)
 
-        image_files = [f for f in os.listdir(self.upload_folder) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-        
-        all_embeddings = []
-        temp_records = []
+        image_files = self.get_image_files()
 
-        print(f"Processing {len(image_files)} images...")
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            keys = list(pool.map(self._file_hash, image_files))
+        pending = [(img_file, key) for img_file, key in zip(image_files, keys) if key is not None and key not in self._cache]
 
-        for idx, img_file in enumerate(image_files):
-            img_path = os.path.join(self.upload_folder, img_file)
-            try:
-                img = Image.open(img_path).convert('RGB')
-                
-                # Detect faces
-                boxes, probs = self.mtcnn.detect(img)
-                
-                if boxes is not None:
-                    # Get cropped faces for embedding generation
-                    # mtcnn(img) returns a tensor of cropped faces if keep_all=True
-                    faces_tensors = self.mtcnn(img) 
-                    
-                    if faces_tensors is not None:
-                        # If only one face, it might not have the batch dim
-                        if faces_tensors.ndim == 3:
-                           faces_tensors = faces_tensors.unsqueeze(0)
-
-                        # Generate embeddings
-                        embeddings = self.resnet(faces_tensors.to(self.device)).detach().cpu().numpy()
-                        
-                        valid_face_count = 0
-                        for i, box in enumerate(boxes):
-                            # Filter by probability to remove blurry/uncertain faces
-                            if probs[i] < 0.90:
-                                continue
-                                
-                            # Save face crop for UI
-                            face_crop_filename = f"face_{idx}_{i}.jpg"
-                            face_crop_path = os.path.join(self.faces_folder, face_crop_filename)
-                            
-                            rotation = 0 # No rotation handling in basic MTCNN usage here
-                            # Manual crop to ensure we have the image file
-                            # box is [x1, y1, x2, y2]
-                            crop_img = img.crop(box)
-                            crop_img.save(face_crop_path)
-
-                            emb = embeddings[i]
-                            
-                            temp_records.append({
-                                'image_path': f'/static/uploads/{img_file}',
-                                'face_crop_path': f'/static/faces/{face_crop_filename}',
-                                'embedding': emb,
-                                'probability': float(probs[i])
-                            })
-                            all_embeddings.append(emb)
-            except Exception as e:
-                print(f"Error processing {img_file}: {e}")
-
-        if not all_embeddings:
+        print(f"Processing {len(image_files)} images ({len(pending)} new)...")
+
+        # Images are decoded on worker threads while the current batch runs through the models
+        for batch in self._batches(self._prefetch_images(pending)):
+            self._process_batch(batch)
+
+        # Drop entries for files that are gone, then clean up their crops
+        self._cache = {key: self._cache[key] for key in keys if key in self._cache}
+        self._remove_orphan_crops()
+        self._save_cache()
+
+        present = [(img_file, self._cache[key]) for img_file, key in zip(image_files, keys) if key in self._cache]
+        n_total = sum(len(entry['face_files']) for _, entry in present)
+
+        if not n_total:
             print("No faces found.")
+            self._reset_state()
             return []
 
+        # Each image's rows are written straight into one preallocated matrix
+        emb = np.empty((n_total, 512), dtype=np.float32)
+        all_probs = np.empty(n_total, dtype=np.float32)
+        image_paths = []
+        face_paths = []
+        k = 0
+        for img_file, entry in present:
+            n_faces = len(entry['face_files'])
+            emb[k:k + n_faces] = entry['embeddings']
+            all_probs[k:k + n_faces] = entry['probs']
+            image_paths.extend([f'/static/uploads/{img_file}'] * n_faces)
+            face_paths.extend(f'/static/faces/{face_file}' for face_file in entry['face_files'])
+            k += n_faces
+
+        # L2-normalize so cosine distances reduce to dot products
+        emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+
         # Clustering
         # Adjusted parameters: 
-        # eps=0.85 (good for grouping variations)
+        # eps=0.85 euclidean (good for grouping variations); on unit vectors
+        # d_euclidean^2 = 2 * d_cosine, so the equivalent cosine eps is 0.85^2 / 2
         # min_samples=3 (filters out faces appearing less than 3 times, effectively removing noise/one-offs)
-        clustering = DBSCAN(eps=0.85, min_samples=2, metric='euclidean').fit(all_embeddings)
-        labels = clustering.labels_
+        labels = cluster_embeddings(emb, eps=0.85 ** 2 / 2, min_samples=2)
 
-        # Assign labels back to records
-        for i, record in enumerate(temp_records):
-            record['cluster_id'] = int(labels[i])
-            self.data_records.append(record)
+        # Half precision is plenty for metrics/PCA and halves the stored bytes
+        self._publish(emb.astype(np.float16), labels.astype(np.int64), all_probs, image_paths, face_paths)
             
         return self.get_people_summary()
 
+    def _process_batch(self, batch):
+        """
+        Detects faces in a batch of (key, img_file, img) items, one MTCNN pass per group of
+        equal-sized images, then embeds every face of the batch in a single ResNet forward pass.
+        Caches the results per image.
+        """
+        by_size = defaultdict(list)
+        for item in batch:
+            by_size[item[2].size].append(item)
+
+        detections = []
+        for group in by_size.values():
+            detections.extend(self._with_fallback(self._detect, group))
+        self._cache.update(self._with_fallback(self._embed, detections))
+
+    def _with_fallback(self, step, items):
+        """
+        Runs step over items whose second field is the image file name, and returns its list of results.
+        If it fails, the items are retried one by one so only the failing image is lost.
+        """
+        if not items:
+            return []
+        try:
+            return step(items)
+        except Exception as e:
+            if len(items) == 1:
+                print(f"Error processing {items[0][1]}: {e}")
+                return []
+            print(f"Error processing batch starting at {items[0][1]}, retrying images one by one: {e}")
+            results = []
+            for item in items:
+                results.extend(self._with_fallback(step, [item]))
+            return results
+
+    def _detect(self, group):
+        """
+        Runs MTCNN over (key, img_file, img) items of equal size, saving each face crop.
+        Returns (key, img_file, faces, probs) per image, faces being None when none was found.
+        """
+        images = [item[2] for item in group]
+        with torch.inference_mode():
+            # Single detection pass at native resolution; results are aligned with the group,
+            # None where no face was found
+            boxes_batch, probs_batch = self.mtcnn.detect(images)
+
+            # extract() also saves each crop for the UI
+            save_paths = [os.path.join(self.faces_folder, self._face_crop_filename(item[0], 0)) for item in group]
+            faces_batch = self.mtcnn.extract(images, boxes_batch, save_paths)
+
+        return [(key, img_file, faces, probs) for (key, img_file, _), faces, probs in zip(group, faces_batch, probs_batch)]
+
+    def _embed(self, detections):
+        """
+        Embeds the faces of (key, img_file, faces, probs) detections in a single forward pass.
+        Returns (key, cache entry) pairs.
+        """
+        detected = [faces for _, _, faces, _ in detections if faces is not None]
+        if detected:
+            # FP16 autocast on CUDA only; cast back to float32 for the sklearn side
+            with torch.inference_mode():
+                faces = self._to_device(detected)
+                with torch.autocast(device_type=self.device.type, dtype=torch.float16, enabled=self.use_amp):
+                    embeddings = self.resnet(faces)
+                embeddings = embeddings.float().cpu().numpy()
+
+        entries = []
+        offset = 0
+        for key, _, faces, probs in detections:
+            # Images without faces are cached too, so they are not scanned again
+            n_faces = 0 if faces is None else len(faces)
+            entries.append((key, {
+                'face_files': [self._face_crop_filename(key, i) for i in range(n_faces)],
+                'probs': [float(p) for p in probs[:n_faces]],
+                'embeddings': embeddings[offset:offset + n_faces].copy() if n_faces else np.empty((0, 512), dtype=np.float32)
+            }))
+            offset += n_faces
+        return entries
+
+    def _reset_state(self):
+        self._publish(
+            np.empty((0, 512), dtype=np.float16), np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.float32), [], []
+        )
+
+    def _publish(self, embeddings, labels, probs, image_paths, face_paths):
+        for array in (embeddings, labels, probs):
+            array.flags.writeable = False
+        version = 0 if self.data is None else self.data.version + 1
+        # A single assignment, so readers see either the old or the new data in full
+        self.data = FaceData(version, embeddings, labels, probs, tuple(image_paths), tuple(face_paths))
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'rb') as f:
+                data = pickle.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable cache {self.cache_path}: {e}")
+            return {}
+        if data.get('version') != CACHE_VERSION:
+            return {}
+        return data['entries']
+
+    def _save_cache(self):
+        # Write to a temp file first so a crash never leaves a truncated cache behind
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': CACHE_VERSION, 'entries': self._cache}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _remove_orphan_crops(self):
+        referenced = {face_file for entry in self._cache.values() for face_file in entry['face_files']}
+        for face_file in os.listdir(self.faces_folder):
+            if face_file not in referenced:
+                os.remove(os.path.join(self.faces_folder, face_file))
+
+    def _to_device(self, face_tensors):
+        """
+        Concatenates per-image face tensors into one batch on the model device.
+        On CUDA the batch is assembled directly in pinned memory so the copy runs asynchronously.
+        """
+        if self.device.type != 'cuda':
+            return torch.cat(face_tensors)
+
+        n_faces = sum(len(f) for f in face_tensors)
+        batch = torch.empty((n_faces, *face_tensors[0].shape[1:]), dtype=face_tensors[0].dtype, pin_memory=True)
+        torch.cat(face_tensors, out=batch)
+        return batch.to(self.device, non_blocking=True)
+
+    def _face_crop_filename(self, key, i):
+        # Named after the file content so crops survive re-runs, and after CACHE_VERSION
+        # so a pipeline change yields new URLs (nginx serves faces/ as immutable).
+        # Follows MTCNN.extract's naming for extra faces: face.jpg, face_2.jpg, face_3.jpg...
+        suffix = '' if i == 0 else f'_{i + 1}'
+        return f"face_v{CACHE_VERSION}_{key[:16]}{suffix}.jpg"
+
+    def _file_hash(self, img_file):
+        img_path = os.path.join(self.upload_folder, img_file)
+        try:
+            with open(img_path, 'rb') as f:
+                return hashlib.file_digest(f, 'sha256').hexdigest()
+        except Exception as e:
+            print(f"Error processing {img_file}: {e}")
+            return None
+
+    def _load_image(self, img_file, key):
+        img_path = os.path.join(self.upload_folder, img_file)
+        try:
+            img = Image.open(img_path).convert('RGB')
+            return key, img_file, img
+        except Exception as e:
+            print(f"Error processing {img_file}: {e}")
+            return None
+
+    def _image_pixels(self, img_file):
+        # Only reads the header, the image is decoded later by _load_image
+        try:
+            with Image.open(os.path.join(self.upload_folder, img_file)) as img:
+                return img.width * img.height
+        except Exception:
+            return 0
+
+    def _prefetch_images(self, files):
+        """
+        Yields loaded images for (img_file, key) pairs in order, decoding ahead on a thread pool
+        as long as the images in flight stay within BATCH_PIXELS. Failed images are yielded as None.
+        """
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            pending = deque()
+            in_flight = 0
+            for img_file, key in files:
+                pixels = self._image_pixels(img_file)
+                while pending and in_flight + pixels > BATCH_PIXELS:
+                    done_pixels, future = pending.popleft()
+                    in_flight -= done_pixels
+                    yield future.result()
+                pending.append((pixels, pool.submit(self._load_image, img_file, key)))
+                in_flight += pixels
+            while pending:
+                yield pending.popleft()[1].result()
+
+    def _batches(self, loaded):
+        """
+        Groups loaded images into batches, in order, of at most BATCH_SIZE images and BATCH_PIXELS.
+        """
+        batch = []
+        pixels = 0
+        for item in loaded:
+            if item is None:
+                continue
+            size = item[2].width * item[2].height
+            if batch and (len(batch) >= BATCH_SIZE or pixels + size > BATCH_PIXELS):
+                yield batch
+                batch = []
+                pixels = 0
+            batch.append(item)
+            pixels += size
+        if batch:
+            yield batch
+
     def get_people_summary(self):
         """
         Returns a dictionary or list used by the API.
         """
+        result = []
+        for cid, (face_url, images) in self._get_people_index().items():
+            result.append({
+                'id': cid,
+                'name': self.names.get(cid, f"Persona {cid}"),
+                'face_url': face_url,
+                'images': list(images)
+            })
+        return result
+
+    def _get_people_index(self):
+        """
+        Groups image paths per cluster, recomputed only when the data changed.
+        Returns {cluster_id: (face_url, images)}; noise (-1) is left out.
+        """
+        snapshot = self.data
+        version, people = self._people_cache
+        if version == snapshot.version:
+            return people
+
+        labels = snapshot.labels
+        image_paths = snapshot.image_paths
+        face_paths = snapshot.face_paths
+
+        buckets = defaultdict(set)
+        for cid, image_path in zip(labels.tolist(), image_paths):
+            if cid != -1:
+                buckets[cid].add(image_path)
+
+        # Use first face of each cluster as thumbnail
+        cluster_ids, first_index = np.unique(labels, return_index=True)
         people = {}
-        for record in self.data_records:
-            cid = record['cluster_id']
+        for cid, idx in zip(cluster_ids.tolist(), first_index.tolist()):
             if cid == -1:
                 continue # Noise, ignore or put in 'unknown'
-            
-            name = self.names.get(cid, f"Persona {cid}")
-            
-            if cid not in people:
-                people[cid] = {
-                    'id': cid,
-                    'name': name,
-                    'face_url': record['face_crop_path'], # Use first face as thumbnail
-                    'images': set()
-                }
-            people[cid]['images'].add(record['image_path'])
-        
-        # Convert sets to lists
-        result = []
-        for cid, data in people.items():
-            data['images'] = list(data['images'])
-            result.append(data)
-        
-        return result
+            people[cid] = (face_paths[idx], list(buckets[cid]))
+
+        self._people_cache = (snapshot.version, people)
+        return people
+
+    def get_image_files(self):
+        """
+        Returns the uploaded image filenames, rescanning the folder only when its mtime changed.
+        """
+        with self._listing_lock:
+            mtime = os.stat(self.upload_folder).st_mtime_ns
+            if mtime != self._image_files_mtime:
+                with os.scandir(self.upload_folder) as entries:
+                    self._image_files = tuple(sorted(e.name for e in entries if e.name.lower().endswith(IMAGE_EXTENSIONS)))
+                self._image_files_mtime = mtime
+            return list(self._image_files)
+
+    def save_upload(self, file, filename):
+        """
+        Saves an uploaded file into upload_folder and records it in the cached listing,
+        so the next listing does not rescan the folder.
+        """
+        with self._listing_lock:
+            mtime_before = os.stat(self.upload_folder).st_mtime_ns
+            file.save(os.path.join(self.upload_folder, filename))
+
+            # Only a listing that was current before the save can be patched;
+            # otherwise something else changed the folder and it must be rescanned
+            if mtime_before != self._image_files_mtime:
+                self._image_files_mtime = None
+                return
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                # Replace rather than mutate, the background worker may be reading the listing
+                self._image_files = tuple(sorted(set(self._image_files) | {filename}))
+            self._image_files_mtime = os.stat(self.upload_folder).st_mtime_ns
 
     def get_gallery_images(self):
         # Just return all uploaded images
-        files = [f for f in os.listdir(self.upload_folder) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-        return [f'/static/uploads/{f}' for f in files]
+        return [f'/static/uploads/{f}' for f in self.get_image_files()]
 
     def get_person_images(self, person_id):
-        images = set()
-        for record in self.data_records:
-            if record['cluster_id'] == int(person_id):
-                images.add(record['image_path'])
-        return list(images)
+        person = self._get_people_index().get(int(person_id))
+        return list(person[1]) if person else []
 
     def rename_person(self, person_id, name):
         self.names[int(person_id)] = name
@@ -164,9 +440,20 @@ class FaceProcessor:
 
     def get_metrics(self):
         """
-        Calculates and returns internal model metrics.
+        Returns internal model metrics, recomputed only when the data changed.
+        """
+        snapshot = self.data
+        version, metrics = self._metrics_cache
+        if version != snapshot.version:
+            metrics = self._compute_metrics(snapshot)
+            self._metrics_cache = (snapshot.version, metrics)
+        return metrics
+
+    def _compute_metrics(self, snapshot):
+        """
+        Calculates internal model metrics.
         """
-        if not self.data_records:
+        if not len(snapshot.labels):
             return {
                 'total_faces': 0,
                 'total_people': 0,
@@ -175,35 +462,36 @@ class FaceProcessor:
                 'silhouette_score': 0
             }
             
-        embeddings = [r['embedding'] for r in self.data_records]
-        labels = [r['cluster_id'] for r in self.data_records]
-        probs = [r['probability'] for r in self.data_records]
+        # sklearn metrics expect float32/float64 input
+        embeddings = snapshot.embeddings.astype(np.float32)
+        labels = snapshot.labels
         
         # Count unique labels (excluding -1 for noise)
-        unique_labels = set(labels)
-        if -1 in unique_labels:
-            unique_labels.remove(-1)
+        unique_labels = np.unique(labels)
+        n_labels = len(unique_labels)
             
-        total_people = len(unique_labels)
-        noise_faces = labels.count(-1)
+        total_people = int((unique_labels != -1).sum())
+        noise_faces = int((labels == -1).sum())
         total_faces = len(labels)
-        avg_confidence = np.mean(probs) if probs else 0
+        avg_confidence = float(snapshot.probs.mean())
         
         # Silhouette Score (requires at least 2 clusters or 1 cluster and noise)
         # Note: Scikit-learn says: "The Silhouette Coefficient is defined for 2 <= n_labels <= n_samples - 1."
-        try:
-            if len(set(labels)) > 1:
-                sil_score = silhouette_score(embeddings, labels, metric='euclidean')
+        # Each score gets its own try, so a failing one does not zero the others
+        sil_score = 0.0
+        db_score = 0.0
+        ch_score = 0.0
+        if n_labels > 1:
+            try:
+                sample = self._silhouette_sample(labels)
+                sil_score = silhouette_score(embeddings[sample], labels[sample], metric='euclidean')
+            except:
+                pass
+            try:
                 db_score = davies_bouldin_score(embeddings, labels)
                 ch_score = calinski_harabasz_score(embeddings, labels)
-            else:
-                sil_score = 0.0
-                db_score = 0.0
-                ch_score = 0.0
-        except:
-            sil_score = 0.0
-            db_score = 0.0
-            ch_score = 0.0
+            except:
+                pass
 
         return {
             'total_faces': total_faces,
@@ -215,24 +503,43 @@ class FaceProcessor:
             'calinski_harabasz': round(ch_score, 4)
         }
 
+    def _silhouette_sample(self, labels):
+        """
+        Indices of up to SILHOUETTE_SAMPLE_SIZE faces, always covering at least two labels.
+        """
+        if len(labels) <= SILHOUETTE_SAMPLE_SIZE:
+            return np.arange(len(labels))
+
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(labels), size=SILHOUETTE_SAMPLE_SIZE, replace=False)
+        if len(np.unique(labels[sample])) < 2:
+            # Dominant cluster only: swap in one face with a different label
+            sample[0] = np.flatnonzero(labels != labels[sample[0]])[0]
+        return sample
+
     def get_scatter_data(self):
         """
         Reduces embeddings to 2D for visualization.
         """
-        if not self.data_records or len(self.data_records) < 2:
+        snapshot = self.data
+        if len(snapshot.labels) < 2:
             return []
 
-        embeddings = [r['embedding'] for r in self.data_records]
-        labels = [r['cluster_id'] for r in self.data_records]
-        paths = [r['face_crop_path'] for r in self.data_records]
+        labels = snapshot.labels.tolist()
+        paths = snapshot.face_paths
         
-        # PCA for dimensionality reduction
-        pca = PCA(n_components=2)
-        coords = pca.fit_transform(embeddings)
+        # PCA for dimensionality reduction, cached until the data changes
+        # Names are applied below on every call, so renames need no invalidation
+        version, coords = self._scatter_cache
+        if version != snapshot.version:
+            # Randomized solver only computes the top-2 components instead of the full SVD
+            pca = PCA(n_components=2, svd_solver='randomized', iterated_power=2, random_state=0)
+            coords = pca.fit_transform(snapshot.embeddings.astype(np.float32))
+            self._scatter_cache = (snapshot.version, coords)
         
         data = []
         for i, (x, y) in enumerate(coords):
-            cid = int(labels[i])
+            cid = labels[i]
             name = "Ruido" if cid == -1 else self.names.get(cid, f"Persona {cid}")
             
             data.append({
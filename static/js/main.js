@@ -129,6 +129,10 @@ function handleFiles(files) {
         body: formData
     })
         .then(response => response.json())
+        .then(data => {
+            if (!data.task_id) throw new Error(data.error);
+            return waitForTask(data.task_id);
+        })
         .then(data => {
             console.log('Success:', data);
             alert(`Procesado exitosamente! SE encontraron ${data.people.length} personas.`);
@@ -144,6 +148,20 @@ function handleFiles(files) {
         });
 }
 
+// Processing runs in the background; poll until it finishes
+function waitForTask(taskId) {
+    return fetch(`/api/task/${taskId}`)
+        .then(res => res.json())
+        .then(data => {
+            if (data.status === 'processing') {
+                return new Promise(resolve => setTimeout(resolve, 1000))
+                    .then(() => waitForTask(taskId));
+            }
+            if (data.status !== 'done') throw new Error(data.error);
+            return data;
+        });
+}
+
 // Gallery Handling
 function loadGallery() {
     fetch('/api/gallery')
@@ -167,6 +185,16 @@ function loadPeople() {
         .then(res => res.json())
         .then(data => {
             const grid = document.getElementById('people-grid');
+
+            // Photos are still being processed; reload once the run finishes
+            if (data.task_id) {
+                grid.innerHTML = '<p>Procesando imágenes y agrupando rostros...</p>';
+                waitForTask(data.task_id)
+                    .then(loadPeople)
+                    .catch(error => console.error('Error:', error));
+                return;
+            }
+
             document.getElementById('people-count').textContent = data.length;
             grid.innerHTML = '';
 
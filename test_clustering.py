@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from sklearn.cluster import DBSCAN
+
+import clustering
+from clustering import cluster_embeddings
+
+# Same parameters as FaceProcessor.process_images
+EPS = 0.85 ** 2 / 2
+MIN_SAMPLES = 2
+
+
+def _faces(n_people, faces_per_person, n_noise, spread, seed):
+    """
+    L2-normalized fake embeddings: faces scattered around one random direction per person,
+    plus faces of people seen only once.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(n_people, 512))
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    emb = np.concatenate((
+        np.repeat(centres, faces_per_person, axis=0) + rng.normal(scale=spread, size=(n_people * faces_per_person, 512)),
+        rng.normal(size=(n_noise, 512)),
+    )).astype(np.float32)
+    emb = emb[rng.permutation(len(emb))]
+    return emb / np.linalg.norm(emb, axis=1, keepdims=True)
+
+
+def _crowd(n, seed):
+    """
+    L2-normalized embeddings spread uniformly over a 3D subspace, so that with a small eps
+    clusters touch and many faces are border points.
+    """
+    rng = np.random.default_rng(seed)
+    emb = np.zeros((n, 512), dtype=np.float32)
+    emb[:, :3] = rng.normal(size=(n, 3))
+    return emb / np.linalg.norm(emb, axis=1, keepdims=True)
+
+
+def _sklearn_labels(emb, eps, min_samples):
+    distances = np.maximum(1.0 - emb.astype(np.float64) @ emb.T.astype(np.float64), 0.0)
+    return DBSCAN(eps=eps, min_samples=min_samples, metric='precomputed').fit_predict(distances)
+
+
+@pytest.mark.parametrize('n_people, faces_per_person, n_noise, spread, seed', [
+    (1, 5, 0, 0.02, 0),
+    (4, 5, 2, 0.02, 1),
+    (20, 6, 7, 0.02, 2),
+    (30, 8, 10, 0.027, 3),
+    (150, 10, 50, 0.02, 4),
+])
+def test_dense_matches_sklearn(n_people, faces_per_person, n_noise, spread, seed):
+    emb = _faces(n_people, faces_per_person, n_noise, spread, seed)
+    assert len(emb) < clustering.HNSW_MIN_FACES
+    labels = cluster_embeddings(emb, eps=EPS, min_samples=MIN_SAMPLES)
+    np.testing.assert_array_equal(labels, _sklearn_labels(emb, EPS, MIN_SAMPLES))
+
+
+@pytest.mark.parametrize('n_people, faces_per_person, n_noise, spread, seed', [
+    (100, 25, 50, 0.02, 5),
+    # Clusters larger than HNSW_NEIGHBOURS must not be split
+    (20, 120, 30, 0.02, 6),
+])
+def test_hnsw_matches_sklearn(n_people, faces_per_person, n_noise, spread, seed):
+    emb = _faces(n_people, faces_per_person, n_noise, spread, seed)
+    assert len(emb) >= clustering.HNSW_MIN_FACES
+    labels = cluster_embeddings(emb, eps=EPS, min_samples=MIN_SAMPLES)
+    np.testing.assert_array_equal(labels, _sklearn_labels(emb, EPS, MIN_SAMPLES))
+
+
+# With min_samples=2 no border points exist, so the border rule is checked with larger values:
+# a border point reachable from several clusters joins the first one, as in sklearn
+@pytest.mark.parametrize('n, eps, min_samples, seed', [
+    (300, 0.01, 4, 0),
+    (1000, 0.004, 5, 1),
+    # HNSW path
+    (3000, 0.002, 6, 2),
+])
+def test_border_points_match_sklearn(n, eps, min_samples, seed):
+    emb = _crowd(n, seed)
+    labels = cluster_embeddings(emb, eps=eps, min_samples=min_samples)
+    np.testing.assert_array_equal(labels, _sklearn_labels(emb, eps, min_samples))